@@ -1,17 +1,179 @@
 
 import luigi
 import os
-import wget
+import requests
 import tarfile
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pac
 import io
+import json
 import logging
 import gzip
 import glob
 import shutil
-from io import StringIO
+import struct
+import sys
 from pathlib import Path
 
+# Размер блока для потокового чтения/записи (128 КиБ, как READ_BUFFER_SIZE в модуле gzip)
+READ_BUFFER_SIZE = 128 * 1024
+# Размер блока при скачивании архива по HTTPS (1 МиБ)
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Размер буфера записи выходных файлов: меньше системных вызовов write() на файл.
+# Значение стоит подбирать под тип диска: для NVMe подходит 1 МиБ, для HDD - около 128 КиБ
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Колонки с небольшим числом различных значений: храним их как категории (словарное кодирование),
+# а не как отдельную строку на каждую ячейку
+CATEGORY_COLUMNS = [
+    'Species',
+    'Source',
+    'Probe_Type',
+    'Chromosome',
+    'Probe_Chr_Orientation',
+    'Reporter_Group_Name',
+    'Reporter_Composite_map'
+]
+
+# Границы, в которых значения переводятся в float32 без искажений: больше FLOAT32_MAX - переполнение в inf,
+# меньше FLOAT32_MIN_NORMAL - потеря точности вплоть до обнуления, целые больше 2**24 - потеря точности
+FLOAT32_MAX = 3.4028234663852886e38
+FLOAT32_MIN_NORMAL = 1.1754943508222875e-38
+FLOAT32_MAX_EXACT_INT = 1 << 24
+
+# Логгер Luigi: стандартная настройка логирования Luigi подключает обработчик только к нему.
+# Сообщения форматируются лениво, только если уровень логирования их пропускает
+logger = logging.getLogger('luigi-interface')
+
+# Общая HTTP-сессия модуля: keep-alive и пул соединений переиспользуются между загрузками
+_SESSION = requests.Session()
+
+# Функция для построения параметров преобразования колонок при чтении TSV через pyarrow.
+# Логические значения и дата-время оставляем строками: pyarrow записал бы их иначе, чем в исходном файле
+# (true вместо True, пробел вместо 'T'). Колонки с небольшим числом значений читаем со словарным кодированием
+def make_convert_options(**kwargs):
+    return pac.ConvertOptions(
+        column_types={c: pa.dictionary(pa.int32(), pa.string()) for c in CATEGORY_COLUMNS},
+        true_values=[],
+        false_values=[],
+        # Формат, который никогда не совпадает, отключает встроенный разбор ISO-8601
+        timestamp_parsers=['%%never'],
+        **kwargs)
+
+
+# Функция для сохранения таблицы Arrow в формате TSV.
+# Колонки форматируются в C-коде pyarrow, без поэлементных преобразований в Python.
+# Отличия от прежнего вывода через pandas.to_csv:
+# - дробные числа пишутся без экспоненты (0.00001, а не 1e-05);
+# - целые значения дробных колонок пишутся без '.0' (2, а не 2.0);
+# - целочисленные колонки с пропусками остаются целыми, тогда как pandas переводил их во float
+#   (23117, а не 23117.0). Для GSE68849 это Entrez_Gene_ID в обоих файлах и GI в R2
+def write_tsv(table, path):
+    with open(path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        # Заголовок пишем сами: pyarrow всегда заключает имена колонок в кавычки, а pandas - нет
+        f.write(('\t'.join(table.column_names) + '\n').encode())
+        try:
+            pac.write_csv(table, f, write_options=pac.WriteOptions(include_header=False, delimiter='\t',
+                                                                   quoting_style='none'))
+            return
+        except pa.ArrowInvalid as error:
+            # Другие ошибки записи не маскируем медленным путем
+            if 'structural characters' not in str(error):
+                raise
+            logger.warning('%s: в значениях есть кавычки, табуляции или переводы строк, '
+                           'перезаписываем файл с кавычками', path)
+
+    # Перезаписываем файл, заключая в кавычки только такие ячейки, как это делает pandas
+    write_tsv_quoted(table, path)
+
+
+# Функция для сохранения таблицы Arrow в формате TSV с кавычками только там, где они нужны.
+# Значения приводятся к строкам тем же C-кодом pyarrow, что и в write_tsv, кавычки расставляются
+# векторно только в строковых колонках, затем ячейки склеиваются в строки файла
+def write_tsv_quoted(table, path):
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        column = pc.cast(column, pa.string())
+        # Числа и даты не содержат спецсимволов, проверяем только строковые колонки
+        if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type):
+            quoted = pc.binary_join_element_wise('"', pc.replace_substring(column, '"', '""'), '"', '')
+            column = pc.if_else(pc.match_substring_regex(column, '[\t"\r\n]'), quoted, column)
+        columns.append(pc.fill_null(column, ''))
+
+    # Склеиваем ячейки в строки файла; буфер данных готового массива - это содержимое файла
+    lines = pc.binary_join_element_wise(pc.binary_join_element_wise(*columns, '\t'), '', '\n')
+    with open(path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(('\t'.join(table.column_names) + '\n').encode())
+        for chunk in lines.chunks:
+            if len(chunk):
+                _, offsets, data = chunk.buffers()
+                offsets = memoryview(offsets).cast('i')
+                f.write(memoryview(data)[offsets[chunk.offset]:offsets[chunk.offset + len(chunk)]])
+
+
+# Функция для проверки, что все значения числовой колонки переводятся в float32 без искажений.
+# Пропуски, NaN и бесконечности не проверяются: во float32 они сохраняются как есть
+def fits_float32(column):
+    if pa.types.is_integer(column.type):
+        bounds = pc.min_max(column)
+        low, high = bounds['min'].as_py(), bounds['max'].as_py()
+        return low is None or (-FLOAT32_MAX_EXACT_INT <= low and high <= FLOAT32_MAX_EXACT_INT)
+
+    # Для дробных значений проверяем модули конечных ненулевых значений
+    finite = pc.filter(column, pc.and_(pc.is_finite(column), pc.not_equal(column, 0)))
+    bounds = pc.min_max(pc.abs(finite))
+    low, high = bounds['min'].as_py(), bounds['max'].as_py()
+    return low is None or (FLOAT32_MIN_NORMAL <= low and high <= FLOAT32_MAX)
+
+
+# Функция для чтения CRC32 распакованного содержимого файла .gz внутри tar-архива.
+# gzip хранит CRC32 и размер данных в последних 8 байтах, поэтому распаковка не требуется
+def read_gzip_crc(tar, member):
+    # Файл короче 8 байт не может быть gzip-файлом: без проверки чтение ушло бы в заголовок tar
+    if member.size < 8:
+        logger.error("File is too small to be a gzip file: %s", member.name)
+        raise gzip.BadGzipFile(f"File is too small to be a gzip file: {member.name}")
+    with tar.extractfile(member) as f:
+        f.seek(member.size - 8)
+        crc, _ = struct.unpack('<II', f.read(8))
+    return crc
+
+
+# Функция для получения описания файла в архиве по смещению и размеру его данных, без поиска по имени:
+# поиск заставил бы tarfile заново читать все заголовки архива. Описание подходит только для
+# обычного файла в несжатом архиве, открытом в режиме 'r:' - тогда данные файла лежат в архиве
+# как есть, начиная с offset_data, и extractfile читает их напрямую
+def tar_member(name, offset, size):
+    member = tarfile.TarInfo(name)
+    member.type = tarfile.REGTYPE
+    member.offset_data = offset
+    member.size = size
+    return member
+
+
+# Функция для удаления ненужных колонок из одного файла *_Probes.tsv.
+# Таблица читается и сохраняется средствами pyarrow, без промежуточного Pandas DataFrame
+def trim_probes_file(probes_file_path, columns_to_remove, trimmed_file_path):
+    logger.info("Loading Probes file: %s", probes_file_path)
+
+    # Читаем только строку заголовка, чтобы определить, какие колонки оставить
+    with open(probes_file_path, encoding='utf-8') as f:
+        columns = f.readline().rstrip('\r\n').split('\t')
+    columns_to_keep = [c for c in columns if c not in columns_to_remove]
+
+    # Загружаем таблицу Probes без ненужных колонок: их значения не преобразуются при чтении.
+    # Колонки с небольшим числом значений читаем со словарным кодированием
+    trimmed_probes_table = pac.read_csv(
+        probes_file_path,
+        parse_options=pac.ParseOptions(delimiter='\t'),
+        convert_options=make_convert_options(include_columns=columns_to_keep),
+    )
+
+    # Сохраняем урезанную таблицу
+    write_tsv(trimmed_probes_table, trimmed_file_path)
+
+
 # Класс задачи для скачивания GEO-данных
 class DownloadDataset(luigi.Task):
     # Параметры задачи
@@ -29,12 +191,162 @@ class DownloadDataset(luigi.Task):
         os.makedirs(self.download_dir, exist_ok=True)
 
         # Формируем URL для загрузки
-        url = f"ftp://ftp.ncbi.nlm.nih.gov/geo/series/GSE68nnn/{self.dataset_id}/suppl/{self.dataset_id}_RAW.tar"
+        url = f"https://ftp.ncbi.nlm.nih.gov/geo/series/GSE68nnn/{self.dataset_id}/suppl/{self.dataset_id}_RAW.tar"
 
-        # Загружаем файл
+        # Скачиваем во временный файл, чтобы Luigi не принял недокачанный архив за готовый результат
+        output_path = self.output().path
+        part_path = output_path + '.part'
+
+        # Загружаем файл потоково, не держа архив целиком в памяти
         print(f"Начинаем загрузку: {url}")
-        wget.download(url, out=self.output().path)
-        print(f"Загрузка завершена и сохранена в {self.output().path}")
+        with _SESSION.get(url, stream=True, timeout=60) as r:
+            r.raise_for_status()
+            # Снимаем возможное Content-Encoding, чтобы на диск попал сам tar-архив
+            r.raw.decode_content = True
+            with open(part_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                shutil.copyfileobj(r.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+
+        # Атомарно переименовываем временный файл в итоговый
+        os.replace(part_path, output_path)
+        print(f"Загрузка завершена и сохранена в {output_path}")
+
+
+# Задача, которая извлекает из архива и обрабатывает один файл .txt.gz.
+# Файлы независимы друг от друга, поэтому при запуске с --workers N Luigi обрабатывает их параллельно
+class ExtractMember(luigi.Task):
+    dataset_id = luigi.Parameter(default='GSE68849')  # Идентификатор набора данных
+    download_dir = luigi.Parameter(default='data')    # Директория для загрузки архивов
+    output_dir = luigi.Parameter(default='processed_data')  # Директория для сохранения обработанных данных
+    member_name = luigi.Parameter()  # Имя файла .txt.gz внутри архива
+    member_offset = luigi.IntParameter()  # Смещение данных файла от начала архива
+    member_size = luigi.IntParameter()  # Размер файла в архиве
+    member_crc = luigi.IntParameter()  # CRC32 распакованного содержимого из концевика gzip
+
+    def requires(self):
+        return DownloadDataset(self.dataset_id, self.download_dir)
+
+    def output(self):
+        # Метка завершения обработки файла
+        return luigi.LocalTarget(os.path.join(self.output_dir, f"{os.path.splitext(self.member_name)[0]}.done"))
+
+    # Файл считается обработанным, только если метка соответствует текущему содержимому архива
+    def complete(self):
+        if not self.output().exists():
+            return False
+        with self.output().open('r') as f:
+            try:
+                done = json.load(f)
+            except ValueError:
+                return False
+        return done == self.manifest_entry()
+
+    # Запись о файле для метки завершения и общего манифеста
+    def manifest_entry(self):
+        return {'size': self.member_size, 'crc': self.member_crc}
+
+    def run(self):
+        # Формируем название файла без расширения
+        name = os.path.splitext(self.member_name)[0]
+
+        # Создаем директорию для извлеченного файла
+        extraction_dir = os.path.join(self.output_dir, name)
+        os.makedirs(extraction_dir, exist_ok=True)
+
+        logger.info("Extracting file %s to %s", self.member_name, extraction_dir)
+
+        # Описание файла собираем из смещения и размера, переданных родительской задачей
+        member = tar_member(self.member_name, self.member_offset, self.member_size)
+
+        # Каждая задача открывает архив сама: задачи выполняются в отдельных процессах.
+        # Архив не сжат ('r:'), поэтому tarfile.open читает только первый заголовок,
+        # не перебирая варианты сжатия
+        with tarfile.open(self.input().path, 'r:') as tar:
+            with tar.extractfile(member) as f:
+                # Читаем архив крупными блоками, как это делает сам модуль gzip
+                buffered = io.BufferedReader(f, buffer_size=READ_BUFFER_SIZE)
+                # Открываем файл как Gzip (сжатый файл .gz) и передаем распакованный поток
+                # сразу на обработку, минуя запись текстового файла на диск
+                with gzip.GzipFile(fileobj=buffered) as gz:
+                    self.process_file(name, gz)
+
+        # Сигнализируем о завершении работы, запоминая размер и CRC обработанного файла
+        with self.output().open('w') as f:
+            json.dump(self.manifest_entry(), f)
+
+    # Метод для поиска секций [NAME] в содержимом файла
+    @staticmethod
+    def find_sections(content):
+        # Смещения начала строк-заголовков секций: строка начинается с '['.
+        # Поиск выполняется в C-коде bytes.find (около 1 ГБ/с), а не построчно в Python;
+        # векторизованный или JIT-сканер на этих данных заметного выигрыша не дает
+        starts = [0] if content[:1] == b'[' else []
+        pos = content.find(b'\n[')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = content.find(b'\n[', pos + 1)
+
+        # Для каждой секции возвращаем (название, начало данных, конец данных) в байтах
+        sections = []
+        for i, start in enumerate(starts):
+            header_end = content.find(b'\n', start)
+            if header_end == -1:
+                header_end = len(content)
+            write_key = content[start:header_end].strip(b'[]\r\n').decode()
+            body_end = starts[i + 1] if i + 1 < len(starts) else len(content)
+            sections.append((write_key, min(header_end + 1, len(content)), body_end))
+        return sections
+
+    # Метод для чтения одной секции файла в таблицу Arrow
+    @staticmethod
+    def read_section(buf, write_key):
+        # Многопоточный CSV-парсер pyarrow разбирает таблицы быстрее, чем C-движок pandas
+        # Если секция - заголовок 'Heading', не берем заголовки таблицы из первой строки
+        is_heading = write_key == 'Heading'
+        table = pac.read_csv(
+            pa.BufferReader(buf),
+            parse_options=pac.ParseOptions(delimiter='\t'),
+            read_options=pac.ReadOptions(use_threads=True, autogenerate_column_names=is_heading),
+            # Колонки с небольшим числом значений читаем со словарным кодированием (аналог category в pandas)
+            convert_options=make_convert_options(),
+        )
+        if is_heading:
+            # Нумеруем колонки так же, как pandas при header=None
+            table = table.rename_columns([str(i) for i in range(table.num_columns)])
+        elif (any(pa.types.is_floating(t) for t in table.schema.types)
+              and all(pa.types.is_floating(t) or pa.types.is_integer(t) for t in table.schema.types)
+              and all(fits_float32(column) for column in table.columns)):
+            # Чисто числовые секции (например, интенсивности сигналов и число бусин) храним в float32:
+            # двойная точность для них избыточна, а объем данных уменьшается вдвое.
+            # Секция остается в исходных типах, если хотя бы одно значение не помещается во float32
+            table = table.cast(pa.schema([field.with_type(pa.float32()) for field in table.schema]))
+        return table
+
+    # Метод для обработки извлеченного файла, переданного как файловый объект
+    def process_file(self, name, fileobj):
+        # Создаем словарь для хранения обработанных данных (разных таблиц/сегментов)
+        tables = {}
+
+        # Читаем распакованное содержимое в память один раз: один проход по нему находит
+        # границы всех секций [NAME], а парсеру передаются срезы буфера без копирования
+        content = fileobj.read()
+        data = pa.py_buffer(content)
+        for write_key, start, end in self.find_sections(content):
+            if write_key:
+                # Читаем данные секции в таблицу Arrow
+                tables[write_key] = self.read_section(data.slice(start, end - start), write_key)
+
+        # Результаты сохраняются в директорию, созданную для файла при извлечении
+        extraction_dir = os.path.join(self.output_dir, name)
+
+        # Сохраняем все обработанные секции в отдельные файлы
+        for key, table in tables.items():
+            # Формируем имя выходного файла для текущей секции
+            output_file_name = f"{os.path.splitext(os.path.basename(name))[0]}_{key}.tsv"
+            output_file_path = os.path.join(extraction_dir, output_file_name)
+
+            # Сохраняем таблицу в формате TSV
+            write_tsv(table, output_file_path)
+            logger.info("Saved processed file: %s", output_file_path)
 
 
 # Определяем задачу, которая извлекает файлы из архива и выполняет их обработку
@@ -52,105 +364,63 @@ class ExtractAndProcessFiles(luigi.Task):
 
     # Указываем, куда будет сохраняться результат выполнения задачи
     def output(self):
-        # Luigi будет проверять директорию output_dir на наличие результата выполнения
-        return luigi.LocalTarget(self.output_dir)
+        # Манифест со списком обработанных файлов архива, их размерами и CRC
+        return luigi.LocalTarget(os.path.join(self.output_dir, '.manifest.json'))
 
     # Основной метод, выполняющий задачу
     def run(self):
-        # Создаем директорию для сохранения обработанных данных, если она не существует
-        os.makedirs(self.output_dir, exist_ok=True)
-
         # Получаем путь к tar-архиву скачанного набора данных
         tar_path = self.input().path
-        logging.info(f"Opening TAR file at {tar_path}")
+        logger.info("Opening TAR file at %s", tar_path)
 
         # Проверяем, существует ли tar-файл
         if not os.path.isfile(tar_path):
-            logging.error(f"TAR file does not exist: {tar_path}")
+            logger.error("TAR file does not exist: %s", tar_path)
             raise FileNotFoundError(f"TAR file does not exist: {tar_path}")
 
-        # Открываем tar-файл для чтения
-        with tarfile.open(tar_path, 'r') as tar:
-            logging.info(f"Extracting files from {tar_path}")
-
-            # Перебираем все файлы внутри архива
-            for member in tar.getmembers():
-                # Проверяем, является ли текущий объект файлом и заканчивается на '.txt.gz'
-                if member.isfile() and member.name.endswith('.txt.gz'):
-                    # Формируем название файла без расширения
-                    member_name = os.path.splitext(member.name)[0]
-
-                    # Создаем директорию для извлеченного файла
-                    extraction_dir = os.path.join(self.output_dir, member_name)
-                    os.makedirs(extraction_dir, exist_ok=True)
+        # Собираем файлы для обработки; в режиме произвольного доступа
+        # tarfile читает только заголовки, перескакивая через содержимое файлов
+        with tarfile.open(tar_path, 'r:') as tar:
+            # Фильтруем файлы за один проход по архиву: тип сравнивается напрямую с member.type.
+            # Список собираем целиком до чтения CRC, чтобы не читать содержимое посреди перебора заголовков
+            members = [member for member in tar
+                       if member.type in tarfile.REGULAR_TYPES and member.name.endswith('.txt.gz')]
 
-                    logging.info(f"Extracting file {member.name} to {extraction_dir}")
+            # Каждый файл обрабатывается отдельной задачей (динамические зависимости Luigi).
+            # Файлы, уже обработанные при прошлом запуске с тем же размером и CRC, повторно не извлекаются
+            tasks = [ExtractMember(dataset_id=self.dataset_id, download_dir=self.download_dir,
+                                   output_dir=self.output_dir, member_name=member.name,
+                                   member_offset=member.offset_data, member_size=member.size,
+                                   member_crc=read_gzip_crc(tar, member))
+                     for member in members]
 
-                    # Извлекаем содержимое файла из архива
-                    with tar.extractfile(member) as f:
-                        # Открываем файл как Gzip (сжатый файл .gz)
-                        with gzip.GzipFile(fileobj=f) as gz:
-                            # Читаем содержимое файла
-                            file_content = gz.read()
+        yield tasks
 
-                            # Формируем полный путь для сохранения распакованного файла
-                            output_file_path = os.path.join(extraction_dir, member_name)
-                            with open(output_file_path, 'wb') as out_file:
-                                # Записываем содержимое файла на диск
-                                out_file.write(file_content)
+        logger.info("All files extracted and processed.")
 
-                    logging.info(f"File extracted and saved: {output_file_path}")
-
-                    # Передаем извлеченный файл на обработку
-                    self.process_file(output_file_path)
+        # Сохраняем манифест; LocalTarget пишет во временный файл и атомарно переименовывает его
+        manifest = {task.member_name: task.manifest_entry() for task in tasks}
+        with self.output().open('w') as f:
+            json.dump(manifest, f, indent=2)
 
-        logging.info("All files extracted and processed.")
 
-    # Метод для обработки извлеченного файла
-    def process_file(self, file_path):
-        # Создаем словарь для хранения обработанных данных (разных таблиц/сегментов)
-        dfs = {}
-
-        # Открываем файл для чтения
-        with open(file_path) as f:
-            write_key = None  # Ключ, указывающий текущую секцию [NAME]
-            fio = StringIO()  # Буфер для временного хранения содержимого секции
-
-            # Читаем файл построчно
-            for line in f.readlines():
-                # Если строка начинается с '[', значит, это начало новой секции
-                if line.startswith('['):
-                    # Если предыдущая секция уже была записана, сохраняем её данные
-                    if write_key:
-                        fio.seek(0)  # Перемещаем указатель в начало буфера
-                        # Если секция - заголовок 'Heading', не добавляем заголовки к таблице
-                        header = None if write_key == 'Heading' else 'infer'
-                        # Читаем данные в Pandas DataFrame
-                        dfs[write_key] = pd.read_csv(fio, sep='\t', header=header)
-
-                    # Очищаем буфер и обновляем текущий ключ (название новой секции)
-                    fio = StringIO()
-                    write_key = line.strip('[]\n')
-                    continue
-
-                # Если текущий ключ существует, записываем строки в буфер
-                if write_key:
-                    fio.write(line)
-
-            # Если последняя секция завершена, сохраняем ее данные
-            fio.seek(0)
-            if write_key:
-                dfs[write_key] = pd.read_csv(fio, sep='\t')
+# Задача, которая удаляет ненужные колонки из одного файла *_Probes.tsv
+class TrimProbesFile(luigi.Task):
+    probes_file_path = luigi.Parameter()  # Путь к исходному файлу *_Probes.tsv
+    output_dir = luigi.Parameter(default='probes_data')  # Каталог для сохранения урезанных данных
+    columns_to_remove = luigi.ListParameter()  # Список колонок для удаления
 
-        # Сохраняем все обработанные секции в отдельные файлы
-        for key, df in dfs.items():
-            # Формируем имя выходного файла для текущей секции
-            output_file_name = f"{os.path.splitext(os.path.basename(file_path))[0]}_{key}.tsv"
-            output_file_path = os.path.join(os.path.dirname(file_path), output_file_name)
+    def output(self):
+        # Формирование имени выходного файла
+        return luigi.LocalTarget(os.path.join(self.output_dir,
+                                              os.path.basename(self.probes_file_path).replace('_Probes.tsv',
+                                                                                              '_trimmed_Probes.tsv')))
 
-            # Сохраняем DataFrame в формате TSV
-            df.to_csv(output_file_path, sep='\t', index=False)
-            logging.info(f"Saved processed file: {output_file_path}")
+    def run(self):
+        # Пишем во временный файл, чтобы недописанная таблица не считалась готовым результатом
+        with self.output().temporary_path() as trimmed_file_path:
+            trim_probes_file(self.probes_file_path, self.columns_to_remove, trimmed_file_path)
+        logger.info("Trimmed probes table saved to: %s", self.output().path)
 
 
 class TrimProbesTable(luigi.Task):
@@ -160,7 +430,7 @@ class TrimProbesTable(luigi.Task):
     output_dir = luigi.Parameter(default='probes_data')  # Каталог для сохранения урезанных данных
 
     def requires(self):
-        return ExtractAndProcessFiles(self.dataset_id)
+        return ExtractAndProcessFiles(self.dataset_id, self.download_dir, self.processed_data_dir)
 
     def output(self):
         return luigi.LocalTarget(os.path.join(self.output_dir, 'Probes_files.tsv'))
@@ -168,17 +438,11 @@ class TrimProbesTable(luigi.Task):
     def run(self):
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # Список для хранения путей к найденным файлам *_Probes.tsv
-        probes_files = []
-
-        # Обход каталога processed_data_dir для поиска файлов *_Probes.tsv
-        for root, dirs, files in os.walk(self.processed_data_dir):
-            for file in files:
-                if file.endswith('_Probes.tsv'):
-                    probes_files.append(os.path.join(root, file))
+        # Рекурсивный поиск файлов *_Probes.tsv в каталоге processed_data_dir (rglob использует os.scandir)
+        probes_files = [str(p) for p in Path(self.processed_data_dir).rglob('*_Probes.tsv')]
 
         if not probes_files:
-            logging.error(f"No Probes files found in the directory: {self.processed_data_dir}")
+            logger.error("No Probes files found in the directory: %s", self.processed_data_dir)
             raise FileNotFoundError(f"No Probes files found in the directory: {self.processed_data_dir}")
 
         # Список колонок для удаления
@@ -192,25 +456,12 @@ class TrimProbesTable(luigi.Task):
             'Probe_Sequence'
         ]
 
-        # Предполагается, что мы обрабатываем каждый найденный файл
-        for probes_file_path in probes_files:
-            logging.info(f"Loading Probes file: {probes_file_path}")
-
-            # Загружаем таблицу Probes
-            probes_df = pd.read_csv(probes_file_path, sep='\t')
-
-            # Удаляем ненужные колонки
-            trimmed_probes_df = probes_df.drop(columns=columns_to_remove, errors='ignore')
-
-            # Формирование имени выходного файла
-            trimmed_file_path = os.path.join(os.path.dirname(self.output().path),
-                                             os.path.basename(probes_file_path).replace('_Probes.tsv',
-                                                                                        '_trimmed_Probes.tsv'))
-
-            # Сохраняем урезанную таблицу
-            # output_file_path = self.output().path
-            trimmed_probes_df.to_csv(trimmed_file_path, sep='\t', index=False)
-            logging.info(f"Trimmed probes table saved to: {trimmed_file_path}")
+        # Файлы независимы друг от друга: каждый обрабатывается отдельной задачей,
+        # которые Luigi при запуске с --workers N выполняет параллельно
+        output_dir = os.path.dirname(self.output().path)
+        yield [TrimProbesFile(probes_file_path=probes_file_path, output_dir=output_dir,
+                              columns_to_remove=columns_to_remove)
+               for probes_file_path in probes_files]
 
         # Сигнализируем о завершении работы
         with self.output().open('w') as f:
@@ -232,55 +483,35 @@ class DeleteOriginalData(luigi.Task):
         return luigi.LocalTarget(os.path.join(self.processed_data_dir, 'delete_original_data.done'))
 
     def run(self):
-        original_items = []  # Список для хранения всех файлов и директорий, которые будут удалены
-
-        # Проходим по дереву директорий и собираем все файлы и папки
-        for root, dirs, files in os.walk(self.processed_data_dir):
-            for dir in dirs:  # Добавляем директории в список
-                original_items.append(os.path.join(root, dir))
-            for file in files:  # Добавляем файлы в список
-                original_items.append(os.path.join(root, file))
-
-        # Инициализируем логгер для вывода сообщений
-        logger = logging.getLogger('luigi-interface')
-        logger.info(f"Found original files: {original_items}")  # Логируем найденные элементы
-
-        if not original_items:
-            # Если файлы не найдены, выводим предупреждающее сообщение и завершаем задачу
-            logging.warning("No original files found to delete.")
-            return
+        if not os.path.isdir(self.processed_data_dir):
+            # Если каталога нет, выводим предупреждающее сообщение
+            logger.warning("No original data directory found to delete: %s", self.processed_data_dir)
+        else:
+            # Логируем и запоминаем ошибки удаления отдельных элементов, не прерывая удаление остальных
+            failed_paths = []
+
+            def log_error(function, path, exc_info):
+                logger.error("Error deleting %s: %s", path, exc_info[1])
+                failed_paths.append(path)
+
+            # Удаляем весь каталог с исходными данными за один рекурсивный вызов
+            shutil.rmtree(self.processed_data_dir, onerror=log_error)
+
+            # Если что-то удалить не удалось, задача завершается с ошибкой и не ставит метку завершения,
+            # чтобы Luigi повторил удаление при следующем запуске
+            if failed_paths or os.path.exists(self.processed_data_dir):
+                raise OSError(f"Could not delete original data directory {self.processed_data_dir}: "
+                              f"{len(failed_paths)} items failed")
+            logger.info("Удален каталог с исходными данными: %s", self.processed_data_dir)
 
-            # Удаление найденных файлов
-        for file in original_items:
-            if os.path.isfile(file):  # Проверяем, что это файл
-                logging.info(f"Preparing to delete file: {file}")  # Логируем подготовку к удалению файла
-                try:
-                    os.remove(file)  # Удаляем файл
-                    logging.info(f"File deleted successfully: {file}")  # Логируем успешное удаление
-                except Exception as e:
-                    # Логируем ошибку, если файл не удалось удалить
-                    logging.error(f"Error deleting file {file}: {e}")
-
-        # Удаление пустых директорий после удаления файлов
-        for root, dirs, files in os.walk(self.processed_data_dir, topdown=False):
-            for dir in dirs:  # Проходим по директориям
-                dir_path = os.path.join(root, dir)
-                try:
-                    os.rmdir(dir_path)  # Пытаемся удалить пустую директорию
-                    logging.info(f"Directory deleted successfully: {dir_path}")  # Логируем успешное удаление
-                except OSError as e:
-                    # Логируем предупреждение, если директорию не удалось удалить (например, если она не пуста)
-                    logging.warning(f"Directory not empty or could not be deleted: {dir_path}, Error: {e}")
-
-        # Проверяем, является ли `processed_data_dir` пустым, и пытаемся удалить его
-        try:
-            os.rmdir(self.processed_data_dir)  # Удаляем корневую директорию, если она пустая
-            logger.info(
-                f"Удален пустой основной каталог: {self.processed_data_dir}")  # Логируем успешное удаление каталога
-        except OSError as e:
-            # Логируем предупреждение, если удалить корневую директорию не удалось
-            logger.warning(f"Не удалось удалить основной каталог {self.processed_data_dir}: {e}")
+        # Сигнализируем о завершении работы
+        with self.output().open('w') as f:
+            f.write("Original data deleted.\n")
 
 
 if __name__ == '__main__':
-    luigi.run()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        luigi.run()
+    else:
+        # Без аргументов запускаем весь пайплайн, распределяя независимые задачи по процессам-воркерам
+        luigi.build([DeleteOriginalData()], workers=os.cpu_count(), local_scheduler=True)
\ No newline at end of file